@@ -10,13 +10,46 @@ Key functionalities include:
 - Validation for user inputs to ensure data integrity.
 - Clear menu-driven interaction for ease of use.
 """
-import json
+import logging
+import mmap
 import os
-from typing import Dict, List, Any
+import sys
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, List, Any, Optional, TypedDict
+
+# orjson parses and emits bytes in native code; fall back to the standard
+# library so the script still runs where orjson is not installed.
+# JSON is written compactly (no indentation) to keep the files small.
+try:
+    import orjson
+
+    def _json_dumps(data: Any) -> bytes:
+        return orjson.dumps(data)
+
+    def _json_dumps_line(data: Any) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+
+    _json_loads = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+    # orjson can parse straight from a memoryview without copying it to bytes
+    _JSON_LOADS_BUFFERS = True
+except ImportError:
+    import json
+
+    def _json_dumps(data: Any) -> bytes:
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+    def _json_dumps_line(data: Any) -> bytes:
+        return json.dumps(data, separators=(",", ":")).encode("utf-8") + b"\n"
+
+    _json_loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+    _JSON_LOADS_BUFFERS = False
 
 # 2. Define Recipe Data Structure
 # - Structure recipe data as JSON using, title, and instructions.
-# - Implement a data structure to represent a list that will hold all our recipe dictionaries in memory.
+# - Implement a data structure to represent a dictionary that will hold all our recipe dictionaries in memory,
+#   keyed by the case-folded recipe title so title lookups don't need to scan every recipe.
 # Each dictionary will represent a single recipe.
 # Example structure of a single recipe dictionary:
 # {
@@ -25,100 +58,386 @@ from typing import Dict, List, Any
 #     "instructions": "Step 1.\nStep 2."
 # }
 
-# Type alias for a single recipe dictionary
-Recipe = Dict[str, Any]
-# Type alias for the collection of recipes
-Recipes = List[Recipe]
+class _CachedRecipeFields(TypedDict, total=False):
+    """Values derived from a recipe and cached on it; never written to disk."""
+    _search_text: str
+
+class Recipe(_CachedRecipeFields):
+    """
+    Schema of a single recipe dictionary.
+
+    Recipes stay plain dictionaries, which orjson decodes natively; this only
+    documents the fields each one holds. Keys starting with an underscore hold
+    cached values and are stripped before saving.
+    """
+    title: str
+    ingredients: List[str]
+    instructions: str
+
+# Type alias for the collection of recipes, keyed by title_key(title)
+Recipes = Dict[str, Recipe]
+# Type alias for a single change record in the change log, e.g.
+# {"op": "add", "recipe": {...}}, {"op": "edit", "key": "old title", "recipe": {...}}
+# or {"op": "delete", "key": "title"}
+Change = Dict[str, Any]
 
 # --- 4. Define the directory for data files and full path ---
-DATA_DIR = "data" # "data" is if Recipe-Manager is the root directory
-RECIPES_FILE = os.path.join(DATA_DIR, "recipes.json")
+# Resolved relative to this script, so it works whichever directory it is run from
+DATA_DIR = Path(__file__).resolve().parent / "data"
+RECIPES_FILE = DATA_DIR / "recipes.json"
+# Append-only log of changes made since RECIPES_FILE was last saved
+RECIPES_LOG = DATA_DIR / "recipes.log"
+# Recipes files at least this big are memory-mapped rather than read into memory
+MMAP_THRESHOLD = 64 * 1024
+# The log is compacted into RECIPES_FILE once it grows past this many times the file's size...
+LOG_COMPACT_RATIO = 4
+# ...but never before it reaches this size (256 KB), so a small or new recipes
+# file isn't rewritten after every few changes
+LOG_COMPACT_MIN_BYTES = 256 * 1024
+# Number of recipes formatted into each write to standard output when listing recipes
+OUTPUT_CHUNK_SIZE = 1024
+
+# Problems reading or writing the data files are logged rather than printed. With no
+# logging configured, Python shows them on standard error as the bare message.
+logger = logging.getLogger(__name__)
+
+def title_key(title: str) -> str:
+    """
+    Returns the key a recipe title is stored under in Recipes.
+
+    Titles are compared case-insensitively, so the key is the case-folded
+    title. Keys are interned, so comparing a looked-up key against the stored
+    one is usually a pointer check rather than a character-by-character compare.
+
+    Args:
+        title (str): The recipe title.
+
+    Returns:
+        str: The interned, case-folded title.
+    """
+    return sys.intern(title.casefold())
 
 # --- File Handling Functions ---
 
+def _without_cache(recipe: Recipe) -> Recipe:
+    """
+    Returns the recipe without its cached underscore-prefixed values, ready to be saved.
+
+    Args:
+        recipe (Recipe): The recipe dictionary to strip.
+
+    Returns:
+        Recipe: A copy of the recipe holding only its saved fields.
+    """
+    return {field: value for field, value in recipe.items() if not field.startswith("_")}
+
+def _load_json_file(file: BinaryIO) -> Any:
+    """
+    Parses the JSON content of an open binary file.
+
+    Large files are memory-mapped and parsed in place, which avoids copying
+    the whole file into a bytes object first. Small files are cheaper to read.
+
+    Args:
+        file (BinaryIO): The file to parse, opened in binary mode.
+
+    Returns:
+        Any: The parsed JSON data.
+    """
+    if _JSON_LOADS_BUFFERS and os.fstat(file.fileno()).st_size >= MMAP_THRESHOLD:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return _json_loads(view)
+            finally:
+                view.release() # The map can't be closed while a view is exported
+    return _json_loads(file.read())
+
 def load_recipes() -> Recipes:
     """
-    Loads recipes from the JSON file.
+    Loads recipes from the JSON file and replays any logged changes on top.
 
-    If the file does not exist or is empty/corrupt, it initializes an empty list.
+    If the file does not exist or is empty/corrupt, it initializes an empty collection,
+    logging a warning in the empty/corrupt case.
+    Recipes are re-keyed with title_key, which also converts files saved by
+    older versions as a list of recipes.
 
     Returns:
-        Recipes: A list of recipe dictionaries loaded from the file.
+        Recipes: A dictionary of recipe dictionaries loaded from the file.
     """
-    os.makedirs(DATA_DIR, exist_ok=True)
     try:
-        with open(RECIPES_FILE, "r") as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+        with open(RECIPES_FILE, "rb") as file:
+            recipes = _load_json_file(file)
+    except FileNotFoundError:
+        recipes = {}
+    except JSONDecodeError as e:
+        logger.warning("Recipes file %s is corrupt, starting with no recipes: %s", RECIPES_FILE, e)
+        recipes = {}
+
+    if isinstance(recipes, dict):
+        recipes = recipes.values()
+    key_of = title_key # Local name saves a global lookup per recipe
+    keyed = {key_of(recipe["title"]): recipe for recipe in recipes}
+    if len(keyed) < len(recipes): # Some titles share a key
+        keyed = _key_renaming_duplicates(recipes)
+    replay_changes(keyed)
+    return keyed
+
+def _key_renaming_duplicates(recipes: Iterable[Recipe]) -> Recipes:
+    """
+    Keys recipes by title_key(title), renaming any whose key is already taken.
+
+    Older versions compared titles with lower(), so a file they saved can hold
+    titles such as "Straße Stew" and "STRASSE Stew" which title_key treats as
+    the same. Rather than dropping one, the later recipe is renamed with a
+    " (2)", " (3)", ... suffix and a warning is logged.
+
+    Args:
+        recipes (Iterable[Recipe]): The recipe dictionaries to key, renamed in place.
+
+    Returns:
+        Recipes: Every recipe, keyed by title_key(title).
+    """
+    keyed = {}
+    for recipe in recipes:
+        title = recipe["title"]
+        key = title_key(title)
+        number = 1
+        while key in keyed:
+            number += 1
+            key = title_key(f"{title} ({number})")
+        if number > 1:
+            recipe["title"] = f"{title} ({number})"
+            logger.warning("Recipe '%s' has the same title as another when case is ignored; renamed to '%s'", title, recipe["title"])
+        keyed[key] = recipe
+    return keyed
   
 def save_recipes(recipes: Recipes) -> None:
     """
-    Saves the current list of recipes to the JSON file.
+    Saves the current recipes to the JSON file and clears the change log.
+
+    The data is written to a temporary file next to RECIPES_FILE which then
+    replaces it in a single rename, so a crash mid-save never leaves a
+    half-written recipes file behind.
 
     Args:
-        recipes (Recipes): The list of recipe dictionaries to save.
+        recipes (Recipes): The recipe dictionaries to save.
     """
-    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp_file = RECIPES_FILE.with_name(RECIPES_FILE.name + ".tmp")
     try:
-        with open(RECIPES_FILE, "w") as file:
-            json.dump(recipes, file, indent=4)
+        with open(tmp_file, "wb") as file:
+            file.write(_json_dumps({key: _without_cache(recipe) for key, recipe in recipes.items()}))
+        os.replace(tmp_file, RECIPES_FILE)
+        # Every logged change is now part of RECIPES_FILE
+        open(RECIPES_LOG, "wb").close()
         print("Recipes saved successfully!")
     except IOError as e:
-        print(f"Error saving recipes: {e}") 
+        # Don't leave the partial temporary file lying around
+        try:
+            tmp_file.unlink()
+        except FileNotFoundError:
+            pass
+        logger.error("Error saving recipes: %s", e)
+
+def append_change(change: Change) -> None:
+    """
+    Appends a single change to the change log.
+
+    Each change is one line of JSON written with a single call, so recording
+    a change costs the same however many recipes there are. The log is
+    folded back into RECIPES_FILE by save_recipes.
+
+    Args:
+        change (Change): The change record to append.
+    """
+    if "recipe" in change:
+        change = {**change, "recipe": _without_cache(change["recipe"])}
+    try:
+        with open(RECIPES_LOG, "ab") as file:
+            file.write(_json_dumps_line(change))
+    except IOError as e:
+        logger.error("Error recording change: %s", e)
+
+def replay_changes(recipes: Recipes) -> None:
+    """
+    Applies the changes recorded in the change log to the given recipes.
+
+    A last line without its newline is repaired, so the next change appended
+    starts on a line of its own: if it is a complete change (the crash came
+    just before the newline) the newline is added, and if it was left
+    half-written by a crash it is cut off the log. Any other line that can't
+    be parsed is skipped without losing the changes after it.
+
+    Args:
+        recipes (Recipes): The recipe dictionaries loaded from RECIPES_FILE, updated in place.
+    """
+    try:
+        with open(RECIPES_LOG, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return
+
+    if data and not data.endswith(b"\n"):
+        tail_start = data.rfind(b"\n") + 1 # 0 when the whole log is the one line
+        try:
+            _json_loads(data[tail_start:])
+            complete = True
+        except JSONDecodeError:
+            complete = False
+        try:
+            with open(RECIPES_LOG, "r+b") as file:
+                if complete:
+                    file.seek(0, os.SEEK_END)
+                    file.write(b"\n")
+                else:
+                    file.truncate(tail_start)
+        except IOError as e:
+            logger.error("Error repairing change log: %s", e)
+        if not complete:
+            data = data[:tail_start]
+
+    for line in data.splitlines():
+        try:
+            change = _json_loads(line)
+        except JSONDecodeError:
+            continue
+        if change["op"] == "delete":
+            recipes.pop(title_key(change["key"]), None)
+        else:
+            if change["op"] == "edit":
+                recipes.pop(title_key(change["key"]), None)
+            recipe = change["recipe"]
+            recipes[title_key(recipe["title"])] = recipe
+
+def log_needs_compaction() -> bool:
+    """
+    Checks whether the change log has grown large enough to be folded into RECIPES_FILE.
+
+    Returns:
+        bool: True if the log is more than LOG_COMPACT_RATIO times the size of
+        RECIPES_FILE and more than LOG_COMPACT_MIN_BYTES.
+    """
+    try:
+        log_size = os.path.getsize(RECIPES_LOG)
+    except OSError:
+        return False
+    try:
+        recipes_size = os.path.getsize(RECIPES_FILE)
+    except OSError:
+        recipes_size = 0
+    return log_size > max(LOG_COMPACT_RATIO * recipes_size, LOG_COMPACT_MIN_BYTES)
+
+# Separates the title and ingredients in a recipe's search text, so a search
+# term can't match across two of them
+SEARCH_TEXT_SEPARATOR = "\x1f"
+
+def _search_text(recipe: Recipe) -> str:
+    """
+    Returns the recipe's title and ingredients as one lowercase string, caching it on the recipe.
+
+    Searching then takes a single substring test per recipe. The cache is
+    computed on first use and dropped whenever the title or ingredients change.
+
+    Args:
+        recipe (Recipe): The recipe dictionary whose search text is needed.
+
+    Returns:
+        str: The lowercase title and ingredients joined by SEARCH_TEXT_SEPARATOR.
+    """
+    search_text = recipe.get("_search_text")
+    if search_text is None:
+        search_text = recipe["_search_text"] = SEARCH_TEXT_SEPARATOR.join([recipe["title"], *recipe["ingredients"]]).lower()
+    return search_text
+
+# --- Input Functions ---
+
+# Set by main() when input is piped in rather than typed at a terminal
+_batch_input = False
+
+def read_until_done(prompt: str = "", strip: bool = False) -> List[str]:
+    """
+    Reads lines of input until the user types 'done'.
+
+    When input is piped in, lines are read straight from the buffered standard
+    input instead of through one input() call (and prompt) per line.
+
+    Args:
+        prompt (str): The prompt shown before each typed line; "{}" is replaced by the number of the next line.
+        strip (bool): Whether to strip whitespace from each line and skip blank lines.
+
+    Returns:
+        List[str]: The lines entered before 'done'.
+    """
+    lines = []
+    while True:
+        if _batch_input:
+            line = sys.stdin.readline()
+            if not line: # End of the piped input
+                break
+            line = line.rstrip("\n")
+        else:
+            line = input(prompt.format(len(lines) + 1))
+        if strip:
+            line = line.strip()
+        if line.lower() == 'done':
+            break
+        if line or not strip:
+            lines.append(line)
+    return lines
+
+# Messages shown when input is rejected, shared with the tests so their expected
+# text can't drift from what is printed. "{}" is replaced by the title entered.
+MSG_EMPTY_TITLE = "Title cannot be empty. Aborting recipe addition."
+MSG_DUPLICATE_TITLE = "A recipe with the title '{}' already exists. Please choose a different title or edit the existing recipe."
+MSG_NO_INGREDIENTS = "A recipe must have at least one ingredient. Aborting recipe."
+MSG_EMPTY_INSTRUCTIONS = "Recipe instructions cannot be empty. Aborting recipe addition."
+MSG_RECIPE_NOT_FOUND = "Recipe with title '{}' not found."
+MSG_INVALID_CHOICE = "Invalid choice. Please enter a number between 1 and 6."
 
 # 3. Implement Recipe Management Functions: add, view, edit, and delete recipes.
 # Adds a new recipe
-def add_recipe(recipes: Recipes) -> None:
+def add_recipe(recipes: Recipes) -> bool:
     """
-    Prompts the user for recipe details and adds a new recipe to the list.
+    Prompts the user for recipe details and adds a new recipe to the collection.
 
     Includes validation for title (not empty, no duplicates),
     ingredients (at least one), and instructions (not empty).
 
     Args:
-        recipes (Recipes): The current list of recipe dictionaries to which the new recipe will be added.
+        recipes (Recipes): The current recipe dictionaries to which the new recipe will be added.
+
+    Returns:
+        bool: True if a recipe was added, False otherwise.
     """
     print("\n--- Add a new recipe ---")
     title = input("Enter recipe title: ").strip()
 
     # Input Validation: Title must not be empty
     if not title:
-        print("Title cannot be empty. Aborting recipe addition.")
-        return
+        print(MSG_EMPTY_TITLE)
+        return False
     
     # Check for duplicate titles (case-insensitive)
-    for recipe in recipes:
-        if recipe["title"].lower() == title.lower():
-            print(f"A recipe with the title '{title}' already exists. Please choose a different title or edit the existing recipe.")
-            return
+    key = title_key(title)
+    if key in recipes:
+        print(MSG_DUPLICATE_TITLE.format(title))
+        return False
 
-    ingredients = []
     print("Enter ingredients one by one (type 'done' on an empty line when finished and press Enter):") # Clarified instruction
-    while True:
-        ingredient = input(f"Ingredient {len(ingredients) + 1}: ").strip()
-        if ingredient.lower() == 'done':
-            break
-        if ingredient: # Only add non-empty ingredients
-            ingredients.append(ingredient)
+    ingredients = read_until_done("Ingredient {}: ", strip=True) # Only non-empty ingredients are kept
     
     if not ingredients:
-        print("A recipe must have at least one ingredient. Aborting recipe.")
-        return
+        print(MSG_NO_INGREDIENTS)
+        return False
 
     print("Enter instructions (type 'done' on an empty line by itself when finished and press Enter): ") # Clarified instruction
-    instructions_lines = []
-    while True:
-        line = input()
-        if line.lower() == 'done':
-            break
-        instructions_lines.append(line)
+    instructions_lines = read_until_done()
     instructions = "\n".join(instructions_lines).strip()
        
     # Input Validation: Instructions must not be empty
     if not instructions:
-        print("Recipe instructions cannot be empty. Aborting recipe addition.")
-        return
+        print(MSG_EMPTY_INSTRUCTIONS)
+        return False
     
     new_recipe = {
         "title": title,
@@ -126,9 +445,33 @@ def add_recipe(recipes: Recipes) -> None:
         "instructions": instructions
     }
 
-    recipes.append(new_recipe)
+    recipes[key] = new_recipe
+    append_change({"op": "add", "recipe": new_recipe})
     print(f"Recipe '{title}' add successfully!")
-    save_recipes(recipes) # Save immediately after adding
+    return True
+
+def _write_recipes(recipes: Iterable[Recipe], label: str, rule_padding: int) -> None:
+    """
+    Writes numbered recipes, with their ingredients and instructions, to standard output.
+
+    The text is built up and written OUTPUT_CHUNK_SIZE recipes at a time
+    instead of with a print() call for every line.
+
+    Args:
+        recipes (Iterable[Recipe]): The recipe dictionaries to write.
+        label (str): The label shown before each recipe's number, e.g. "Recipe".
+        rule_padding (int): How much longer than the title the rule under each recipe is.
+    """
+    out = []
+    for i, recipe in enumerate(recipes, 1):
+        title = recipe['title']
+        out.append(f"\n--- {label} {i}: {title} ---\nIngredients:\n")
+        out.extend([f"- {ingredient}\n" for ingredient in recipe['ingredients']])
+        out.append(f"\nInstructions:\n{recipe['instructions']}\n{'-' * (len(title) + rule_padding)}\n")
+        if i % OUTPUT_CHUNK_SIZE == 0:
+            sys.stdout.write("".join(out))
+            out.clear()
+    sys.stdout.write("".join(out))
 
 # View all recipes
 def view_recipes(recipes: Recipes) -> None:
@@ -138,7 +481,7 @@ def view_recipes(recipes: Recipes) -> None:
     If no recipes are available, it prints a corresponding message.
 
     Args:
-        recipes (Recipes): The list of recipe dictionaries to display.
+        recipes (Recipes): The recipe dictionaries to display.
     """
     print("\n--- All Recipes ---")
     if not recipes:
@@ -146,14 +489,7 @@ def view_recipes(recipes: Recipes) -> None:
         return
     
     print(f"There are {len(recipes)} available recipe(s) listed below:")
-    for i, recipe in enumerate(recipes):
-        print(f"\n--- Recipe {i+1}: {recipe['title']} ---")
-        print("Ingredients:")
-        for ingredient in recipe['ingredients']:
-            print(f"- {ingredient}")
-        print("\nInstructions:")  
-        print(recipe['instructions'])
-        print("-" * (len(recipe['title']) + 14))
+    _write_recipes(recipes.values(), "Recipe", 14)
 
 # Search by title or ingredients
 def search_recipes(recipes: Recipes) -> None:
@@ -163,7 +499,7 @@ def search_recipes(recipes: Recipes) -> None:
     Displays all recipes that contain the search term (case-insensitive).
 
     Args:
-        recipes (Recipes): The list of recipe dictionaries to search through.
+        recipes (Recipes): The recipe dictionaries to search through.
     """
     print("\n--- Search Recipes ---")
     if not recipes:
@@ -175,33 +511,17 @@ def search_recipes(recipes: Recipes) -> None:
         print("Search term cannot be empty.")
         return
 
-    found_recipes = []
-    for recipe in recipes:
-        # Search by title
-        if search_term in recipe["title"].lower():
-            found_recipes.append(recipe)
-            continue # Move to the next recipe once found by title
-
-        # Search by ingredients
-        for ingredient in recipe["ingredients"]:
-            if search_term in ingredient.lower():
-                found_recipes.append(recipe)
-                break # Found in ingredients, no need to check other ingredients of this recipe
-      
+    # Search by title and ingredients in one pass over each recipe's search text
+    search_text = _search_text # Local name saves a global lookup per recipe
+    found_recipes = [recipe for recipe in recipes.values() if search_term in search_text(recipe)]
+
     if not found_recipes:
         print(f"No recipes found matching '{search_term}'.")
     else:
         print(f"Found {len(found_recipes)} recipe(s) matching '{search_term}':")
-        for i, recipe in enumerate(found_recipes):
-            print(f"\n--- Found Recipe {i+1}: {recipe['title']} ---")
-            print("Ingredients:")
-            for ingredient in recipe['ingredients']:
-                print(f"- {ingredient}")
-            print("\nInstructions:")
-            print(recipe['instructions'])
-            print("-" * (len(recipe['title']) + 18))
+        _write_recipes(found_recipes, "Found Recipe", 18)
 
-def edit_recipe(recipes: Recipes) -> None:
+def edit_recipe(recipes: Recipes) -> bool:
     """
     Edits an existing recipe by its title.
 
@@ -209,27 +529,25 @@ def edit_recipe(recipes: Recipes) -> None:
     Users can keep existing values by pressing Enter without typing new input.
 
     Args:
-        recipes (Recipes): The list of recipe dictionaries to modify.
+        recipes (Recipes): The recipe dictionaries to modify.
+
+    Returns:
+        bool: True if a recipe was edited, False otherwise.
     """
     print("\n--- Edit Recipe ---")
     if not recipes:
         print("No recipes available to edit.")
-        return
+        return False
 
     view_recipes(recipes) # First, list recipes so the user knows what to edit
     title_to_edit = input("\nEnter the TITLE of the recipe you want to edit: ").strip()
 
     # Find the recipe
-    recipe_found = None
-    for i, recipe in enumerate(recipes):
-        if recipe["title"].lower() == title_to_edit.lower():
-            recipe_found = recipe
-            recipe_index = i # Keep track of the index for duplicate title check on edit
-            break
-
-    if not recipe_found:
-        print(f"Recipe with title '{title_to_edit}' not found.")
-        return
+    key = title_key(title_to_edit)
+    recipe_found = recipes.get(key)
+    if recipe_found is None:
+        print(MSG_RECIPE_NOT_FOUND.format(title_to_edit))
+        return False
 
     print(f"\nEditing recipe: '{recipe_found['title']}'")
     print("Enter new details (press Enter to keep current value):")
@@ -238,14 +556,15 @@ def edit_recipe(recipes: Recipes) -> None:
     new_title = input(f"New Title (Current: {recipe_found['title']}): ").strip()
     if new_title:
         # Check for duplicate new title, excluding the current recipe being edited
-        is_duplicate = False
-        for i, r in enumerate(recipes):
-            if i != recipe_index and r["title"].lower() == new_title.lower():
-                print(f"Error: A recipe with the title '{new_title}' already exists. Title not updated.")
-                is_duplicate = True
-                break
-        if not is_duplicate:
+        new_key = title_key(new_title)
+        if new_key != key and new_key in recipes:
+            print(f"Error: A recipe with the title '{new_title}' already exists. Title not updated.")
+        else:
+            # Re-key the recipe under its new title
+            del recipes[key]
+            recipes[new_key] = recipe_found
             recipe_found["title"] = new_title
+            recipe_found.pop('_search_text', None) # Cached search text is now stale
 
     # Edit Ingredients
     print("\n--- Edit Ingredients ---")
@@ -253,23 +572,19 @@ def edit_recipe(recipes: Recipes) -> None:
     for i, ing in enumerate(recipe_found['ingredients']):
         print(f"{i+1}. {ing}")
 
-    new_ingredients = []
     print("Enter new ingredients one by one (type 'done' on an empty line when finished).")
     print("To remove an ingredient, simply don't re-enter it.")
     print("To keep existing ingredients, type them again or re-enter 'done' immediately.")
-    while True:
-        ingredient = input(f"New Ingredient {len(new_ingredients) + 1} (or 'done'): ").strip()
-        if ingredient.lower() == 'done':
-            break
-        if ingredient:
-            new_ingredients.append(ingredient)
+    new_ingredients = read_until_done("New Ingredient {} (or 'done'): ", strip=True)
 
     if new_ingredients: # Only update if new ingredients were provided
         recipe_found['ingredients'] = new_ingredients
+        recipe_found.pop('_search_text', None) # Cached search text is now stale
     else:
         # Give option to clear ingredients or keep existing if user just types 'done'
         if input("No new ingredients entered. Clear all current ingredients? (yes/no): ").lower() == 'yes':
             recipe_found['ingredients'] = []
+            recipe_found.pop('_search_text', None)
             print("Ingredients cleared.")
         else:
             print("Keeping original ingredients.")
@@ -281,12 +596,7 @@ def edit_recipe(recipes: Recipes) -> None:
     print("Enter new instructions (type 'done' on an empty line by itself when finished).")
     print("Press Enter immediately to keep current instructions.")
 
-    new_instructions_lines = []
-    while True:
-        line = input()
-        if line.lower() == 'done':
-            break
-        new_instructions_lines.append(line)
+    new_instructions_lines = read_until_done()
 
     if new_instructions_lines: # Only update if new instructions were provided
         new_instructions = "\n".join(new_instructions_lines).strip()
@@ -297,37 +607,61 @@ def edit_recipe(recipes: Recipes) -> None:
     else:
         print("Keeping original instructions.")
 
+    append_change({"op": "edit", "key": key, "recipe": recipe_found})
     print(f"Recipe '{recipe_found['title']}' updated successfully!")
-    save_recipes(recipes) # Save immediately after editing
+    return True
 
-def delete_recipe(recipes: Recipes) -> None:
+def delete_recipe(recipes: Recipes) -> bool:
     """
-    Deletes a recipe from the list by its title.
+    Deletes a recipe from the collection by its title.
 
     Args:
-        recipes (Recipes): The list of recipe dictionaries to delete from.
+        recipes (Recipes): The recipe dictionaries to delete from.
+
+    Returns:
+        bool: True if a recipe was deleted, False otherwise.
     """
     print("\n--- Delete Recipe ---")
     if not recipes:
         print("No recipes available to delete.")
-        return
+        return False
 
     view_recipes(recipes) # Show recipes so user knows what to delete
     title_to_delete = input("\nEnter the TITLE of the recipe you want to delete: ").strip()
 
-    initial_len = len(recipes)
-    # Using a list comprehension to rebuild the list without the deleted item
-    recipes[:] = [recipe for recipe in recipes if recipe["title"].lower() != title_to_delete.lower()]
+    key = title_key(title_to_delete)
+    if recipes.pop(key, None) is None:
+        print(MSG_RECIPE_NOT_FOUND.format(title_to_delete))
+        return False
 
-    if len(recipes) < initial_len:
-        print(f"Recipe '{title_to_delete}' deleted successfully!")
-        save_recipes(recipes) # Save immediately after deleting
-    else:
-        print(f"Recipe with title '{title_to_delete}' not found.")
+    append_change({"op": "delete", "key": key})
+
+    print(f"Recipe '{title_to_delete}' deleted successfully!")
+    return True
 
 # --- 5. User Interface (Main Application Loop) ---
 
-print(f"Recipe Manager System Initialized.")
+# The main menu, written in one go each time round the loop
+MENU = (
+    "\n--- Welcome to the Recipe Manager! ---\n"
+    "Please enter an action from the options below:\n"
+    "1. Add a new recipe\n"
+    "2. View all recipes\n"
+    "3. Search for recipes\n"
+    "4. Edit a recipe\n"
+    "5. Delete a recipe\n"
+    "6. Exit Program\n\n"
+)
+# The menu choice to exit the program
+EXIT_CHOICE = "6"
+# The action for each other menu choice. Actions that change the recipes return True when they do.
+MENU_ACTIONS: Dict[str, Callable[[Recipes], Optional[bool]]] = {
+    "1": add_recipe,
+    "2": view_recipes,
+    "3": search_recipes,
+    "4": edit_recipe,
+    "5": delete_recipe,
+}
 
 # Loop program
 def main() -> None:
@@ -336,36 +670,42 @@ def main() -> None:
 
   It loads existing recipes, displays the main menu, and handles
   user interactions by calling the appropriate recipe management functions.
+  Each change is appended to the change log as it is made; the whole
+  recipes file is only rewritten on exit or once the log grows too large.
+  If the program is stopped another way (e.g. Ctrl-C), nothing is saved: every
+  finished change is already in the log and is replayed on the next load, while
+  an action cut off part way through is discarded.
   """
+  global _batch_input
+  print("Recipe Manager System Initialized.")
+  _batch_input = not sys.stdin.isatty() # Read multi-line entries in bulk when input is piped in
+  os.makedirs(DATA_DIR, exist_ok=True) # Created once here rather than on every load and save
   recipes = load_recipes() # Load recipes at the start of the program
+  unsaved_changes = 0 # Number of changes made since the last save
+
+  def save_if_changed() -> None:
+      nonlocal unsaved_changes
+      if unsaved_changes:
+          save_recipes(recipes)
+          unsaved_changes = 0
 
   while True:
-        print("\n--- Welcome to the Recipe Manager! ---")
-        print("Please enter an action from the options below:")
-        print("1. Add a new recipe")
-        print("2. View all recipes")
-        print("3. Search for recipes")
-        print("4. Edit a recipe")
-        print("5. Delete a recipe")
-        print("6. Exit Program\n")
+        sys.stdout.write(MENU)
 
         choice = input("Please enter your choice (1-6): ")
 
-        if choice == "1":
-            add_recipe(recipes)
-        elif choice == "2":
-            view_recipes(recipes)
-        elif choice == "3":
-            search_recipes(recipes)
-        elif choice == "4":
-            edit_recipe(recipes)
-        elif choice == "5":
-            delete_recipe(recipes)
-        elif choice == "6":
+        if choice == EXIT_CHOICE:
+            save_if_changed()
             print("Exiting Recipe Manager. Goodbye!")
             break # Exsit the loop
-        else:
-            print("Invalid choice. Please enter a number between 1 and 6.")
+
+        action = MENU_ACTIONS.get(choice)
+        if action is None:
+            print(MSG_INVALID_CHOICE)
+        elif action(recipes):
+            unsaved_changes += 1
+            if log_needs_compaction():
+                save_if_changed()
 
 # This ensures main() is called only when the script is executed directly
 if __name__ == "__main__":
@@ -1,63 +1,338 @@
 import unittest
+import io
 import os
 import json
 from unittest.mock import patch, mock_open
-import sys 
+import tempfile
+import time
+from pathlib import Path
+
+# Import all relevant functions and constants from your main script.
+# 'python -m unittest' puts the project root (the current directory) on the
+# Python path, so 'recipe_manager' is found without adjusting sys.path here.
+from recipe_manager import add_recipe, view_recipes, search_recipes, edit_recipe, delete_recipe, load_recipes, save_recipes, append_change, log_needs_compaction, main, title_key, MENU, MMAP_THRESHOLD
+from recipe_manager import MSG_EMPTY_TITLE, MSG_DUPLICATE_TITLE, MSG_NO_INGREDIENTS, MSG_EMPTY_INSTRUCTIONS, MSG_RECIPE_NOT_FOUND, MSG_INVALID_CHOICE
+
+# Test data files go in a RAM-backed tmpfs where there is one, so the file
+# tests don't wait on the disk; elsewhere the system temporary directory is used
+TEST_TMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Recipes already present in the tests that need some. Built once here and
+# copied by base_recipes(), so no test can change them for the others.
+BASE_RECIPES = (
+    {"title": "Existing Recipe", "ingredients": ("A",), "instructions": "B"},
+)
+
+def best_time(function, repeat=5):
+    """Returns the shortest time, in seconds, taken by repeat calls of function."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def base_recipes():
+    """Returns a fresh copy of BASE_RECIPES, keyed by title_key(title) like the recipes in recipe_manager."""
+    return {title_key(recipe["title"]): dict(recipe, ingredients=list(recipe["ingredients"])) for recipe in BASE_RECIPES}
+
+class RecipeManagerTestCase(unittest.TestCase):
+    """Base class for the tests, sharing one temporary data directory between each class's tests."""
+
+    # This runs once, before any of the class's test methods
+    @classmethod
+    def setUpClass(cls):
+        # Point the data files at a temporary directory, removed after the class's tests,
+        # so the real recipes next to recipe_manager.py are never touched
+        data_dir = tempfile.TemporaryDirectory(dir=TEST_TMP_DIR)
+        cls.addClassCleanup(data_dir.cleanup)
+        cls.data_dir = Path(data_dir.name)
+        cls.test_file_path = cls.data_dir / "recipes.json"
+        cls.log_path = cls.data_dir / "recipes.log"
+        for name, value in (("DATA_DIR", cls.data_dir), ("RECIPES_FILE", cls.test_file_path), ("RECIPES_LOG", cls.log_path)):
+            path_patcher = patch(f'recipe_manager.{name}', value)
+            path_patcher.start()
+            cls.addClassCleanup(path_patcher.stop)
 
-# Add the parent directory (project root) to the Python path
-# This ensures that 'recipe_manager' can be found
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.abspath(os.path.join(current_dir, '..')) # Go up one level from 'tests'
-sys.path.insert(0, project_root)
-
-# Import all relevant functions and constants from your main script
-from recipe_manager import add_recipe, view_recipes, search_recipes, edit_recipe, delete_recipe, load_recipes, save_recipes, RECIPES_FILE, DATA_DIR
-
-class TestRecipeManager(unittest.TestCase):
     # This setup method runs before each test method
     def setUp(self):
-        # Ensure the data directory exists
-        os.makedirs(DATA_DIR, exist_ok=True)
-        # Define a path for a temporary test file
-        self.test_file_path = RECIPES_FILE
-        # Ensure the test file is clean before each test
-        if os.path.exists(self.test_file_path):
-            os.remove(self.test_file_path)
-
-        # Initialize an empty in-memory list for recipes for most tests.
+        # Initialize an empty in-memory collection for recipes for most tests, keyed by title_key(title).
         # Note: For tests that interact with file persistence, we'll use load_recipes/save_recipes directly.
-        self.test_recipes_data = []
+        self.test_recipes_data = {}
+
+        # Answer input() prompts from the lines given to set_input(), patched once here
+        # rather than with a separate patch in every test
+        self.input_lines = iter(())
+        input_patcher = patch('builtins.input', lambda prompt='': next(self.input_lines))
+        input_patcher.start()
+        self.addCleanup(input_patcher.stop)
+
+        # Capture everything written to standard output (e.g. by view_recipes)
+        stdout_patcher = patch('sys.stdout', new_callable=io.StringIO)
+        self.stdout = stdout_patcher.start()
+        self.addCleanup(stdout_patcher.stop)
+
+    def set_input(self, lines):
+        """Sets the lines returned, in order, by the following input() calls."""
+        self.input_lines = iter(lines)
+
+    def assertInOrder(self, text, parts):
+        """Checks that each of parts appears in text, in the given order, in a single pass over it."""
+        position = 0
+        for part in parts:
+            found = text.find(part, position)
+            if found == -1:
+                self.fail(f"{part!r} not found in order in {text!r}")
+            position = found + len(part)
+
+class TestRecipeManagerIO(RecipeManagerTestCase):
+    """Tests that save and load the recipes file and change log."""
 
-    # This teardown method runs after each test method
-    def tearDown(self):
-        # Clean up the test file after each test
-        if os.path.exists(self.test_file_path):
-            os.remove(self.test_file_path)
-        # Optionally, remove the data directory if it's empty after tests
-        if os.path.exists(DATA_DIR) and not os.listdir(DATA_DIR):
-             os.rmdir(DATA_DIR)
+    def setUp(self):
+        super().setUp()
+        # Start each test with an empty data directory, whatever files the one before left in it
+        for path in self.data_dir.iterdir():
+            path.unlink()
 
     def test_load_recipes_empty_file(self):
-        """Tests that load_recipes returns an empty list if the file doesn't exist."""
+        """Tests that load_recipes returns an empty collection if the file doesn't exist."""
         recipes = load_recipes()
-        self.assertEqual(recipes, [])
+        self.assertEqual(recipes, {})
 
     def test_save_and_load_recipes(self):
         """Tests that recipes are correctly saved to and loaded from the file."""
-        test_data = [
-            {"title": "Saved Dish", "ingredients": ["Rice", "Water"], "instructions": "Cook rice with water."}
-        ]
+        test_data = {
+            "saved dish": {"title": "Saved Dish", "ingredients": ["Rice", "Water"], "instructions": "Cook rice with water."}
+        }
         save_recipes(test_data) # This saves to self.test_file_path
         loaded_data = load_recipes()
         self.assertEqual(loaded_data, test_data)
 
-    # Patch 'save_recipes' to prevent actual file writes during add/edit/delete tests
-    # We test save_recipes directly in test_save_and_load_recipes
-    @patch('recipe_manager.save_recipes')
-    def test_add_recipe_success(self, mock_save_recipes):
+    @patch('recipe_manager._JSON_LOADS_BUFFERS', False) # A mocked file has no descriptor to memory-map
+    def test_save_and_load_recipes_with_mock_open(self):
+        """Tests the save and load round trip through a mocked open(), without touching any files."""
+        test_data = {
+            "saved dish": {"title": "Saved Dish", "ingredients": ["Rice", "Water"], "instructions": "Cook rice with water."}
+        }
+        written = mock_open()
+        with patch('builtins.open', written), patch('recipe_manager.os.replace', lambda src, dst: None):
+            save_recipes(test_data)
+        saved = b"".join(c.args[0] for c in written.return_value.write.call_args_list)
+        self.assertEqual(json.loads(saved), test_data)
+
+        read = mock_open(read_data=saved)
+        read.side_effect = [read.return_value, FileNotFoundError()] # The recipes file, then no change log
+        with patch('builtins.open', read):
+            self.assertEqual(load_recipes(), test_data)
+        self.assertEqual(list(self.data_dir.iterdir()), [])
+
+    def test_save_recipes_failure_keeps_existing_file(self):
+        """Tests that a failed save leaves the previous file intact and no temporary file behind."""
+        test_data = {
+            "saved dish": {"title": "Saved Dish", "ingredients": ["Rice", "Water"], "instructions": "Cook rice with water."}
+        }
+        save_recipes(test_data)
+        with patch('recipe_manager.os.replace', side_effect=OSError("disk full")), \
+                self.assertLogs('recipe_manager', level='ERROR') as logs:
+            save_recipes({})
+        self.assertEqual(load_recipes(), test_data)
+        self.assertFalse(self.test_file_path.with_name("recipes.json.tmp").exists())
+        self.assertEqual(logs.output, ["ERROR:recipe_manager:Error saving recipes: disk full"])
+
+    def test_append_change_failure_is_logged(self):
+        """Tests that a change which can't be written to the log is reported as an error."""
+        self.log_path.mkdir() # Opening a directory for appending fails
+        self.addCleanup(self.log_path.rmdir)
+        with self.assertLogs('recipe_manager', level='ERROR') as logs:
+            append_change({"op": "delete", "key": "old dish"})
+        self.assertEqual(len(logs.records), 1)
+        self.assertTrue(logs.records[0].getMessage().startswith("Error recording change: "))
+
+    def test_load_recipes_replays_change_log(self):
+        """Tests that changes logged since the last save are applied when loading, and cleared by saving."""
+        save_recipes({
+            "old dish": {"title": "Old Dish", "ingredients": ["Rice"], "instructions": "Cook."},
+            "gone dish": {"title": "Gone Dish", "ingredients": ["Air"], "instructions": "Wait."}
+        })
+        append_change({"op": "add", "recipe": {"title": "New Dish", "ingredients": ["Pasta"], "instructions": "Boil."}})
+        append_change({"op": "edit", "key": "old dish", "recipe": {"title": "Better Dish", "ingredients": ["Rice"], "instructions": "Cook well."}})
+        append_change({"op": "delete", "key": "gone dish"})
+        with open(self.log_path, "ab") as file:
+            file.write(b'{"op": "add", "reci') # Torn write from a crash
+
+        expected = {
+            "new dish": {"title": "New Dish", "ingredients": ["Pasta"], "instructions": "Boil."},
+            "better dish": {"title": "Better Dish", "ingredients": ["Rice"], "instructions": "Cook well."}
+        }
+        self.assertEqual(load_recipes(), expected)
+
+        save_recipes(expected)
+        self.assertEqual(os.path.getsize(self.log_path), 0)
+        self.assertEqual(load_recipes(), expected)
+
+    def test_change_log_recovers_from_torn_write(self):
+        """Tests that changes appended after a crash mid-append are kept by the following loads."""
+        append_change({"op": "add", "recipe": {"title": "A", "ingredients": ["1"], "instructions": "x"}})
+        with open(self.log_path, "ab") as file:
+            file.write(b'{"op": "add", "reci') # Torn write from a crash
+
+        self.assertEqual(list(load_recipes()), ["a"]) # The next session loads...
+        self.assertTrue(self.log_path.read_bytes().endswith(b"}\n")) # ...cutting off the torn line
+        append_change({"op": "add", "recipe": {"title": "B", "ingredients": ["2"], "instructions": "y"}})
+        append_change({"op": "add", "recipe": {"title": "C", "ingredients": ["3"], "instructions": "z"}})
+
+        self.assertEqual(list(load_recipes()), ["a", "b", "c"])
+
+    def test_change_log_keeps_complete_last_line_without_newline(self):
+        """Tests that a complete last change missing only its newline is replayed and the newline added."""
+        append_change({"op": "add", "recipe": {"title": "A", "ingredients": ["1"], "instructions": "x"}})
+        self.log_path.write_bytes(self.log_path.read_bytes().rstrip(b"\n")) # Crash just before the newline
+
+        self.assertEqual(list(load_recipes()), ["a"])
+        append_change({"op": "add", "recipe": {"title": "B", "ingredients": ["2"], "instructions": "y"}})
+        self.assertEqual(list(load_recipes()), ["a", "b"])
+
+    def test_replay_skips_damaged_line(self):
+        """Tests that a damaged line in the middle of the log doesn't discard the changes after it."""
+        append_change({"op": "add", "recipe": {"title": "A", "ingredients": ["1"], "instructions": "x"}})
+        with open(self.log_path, "ab") as file:
+            file.write(b'{"op": "add", "reci\n')
+        append_change({"op": "add", "recipe": {"title": "B", "ingredients": ["2"], "instructions": "y"}})
+        self.assertEqual(list(load_recipes()), ["a", "b"])
+
+    def test_append_change_leaves_recipes_file_alone(self):
+        """Tests that each change is appended to the log as one JSON line without rewriting the recipes file."""
+        save_recipes({"old dish": {"title": "Old Dish", "ingredients": ["Rice"], "instructions": "Cook."}})
+        saved = self.test_file_path.read_bytes()
+
+        changes = [
+            {"op": "add", "recipe": {"title": "New Dish", "ingredients": ["Pasta"], "instructions": "Boil."}},
+            {"op": "delete", "key": "old dish"}
+        ]
+        for change in changes:
+            append_change(change)
+
+        self.assertEqual(self.test_file_path.read_bytes(), saved)
+        self.assertEqual([json.loads(line) for line in self.log_path.read_bytes().splitlines()], changes)
+
+    @patch('recipe_manager.LOG_COMPACT_MIN_BYTES', 100)
+    def test_log_needs_compaction(self):
+        """Tests that the log needs compacting once it outgrows both LOG_COMPACT_RATIO times the recipes file and LOG_COMPACT_MIN_BYTES."""
+        self.assertFalse(log_needs_compaction()) # No log yet
+
+        self.log_path.write_bytes(b"x" * 100)
+        self.assertFalse(log_needs_compaction()) # At the minimum size, with no recipes file
+        self.log_path.write_bytes(b"x" * 101)
+        self.assertTrue(log_needs_compaction())
+
+        self.test_file_path.write_bytes(b"x" * 50) # LOG_COMPACT_RATIO times this is 200 bytes
+        self.assertFalse(log_needs_compaction())
+        self.log_path.write_bytes(b"x" * 200)
+        self.assertFalse(log_needs_compaction())
+        self.log_path.write_bytes(b"x" * 201)
+        self.assertTrue(log_needs_compaction())
+
+    def test_save_and_load_large_recipes_file(self):
+        """Tests that a recipes file above the memory-mapping threshold loads correctly."""
+        test_data = {
+            f"dish {i}": {"title": f"Dish {i}", "ingredients": ["Rice", "Water"], "instructions": "Cook rice with water."}
+            for i in range(2000)
+        }
+        save_recipes(test_data)
+        self.assertGreaterEqual(os.path.getsize(self.test_file_path), MMAP_THRESHOLD)
+        self.assertEqual(load_recipes(), test_data)
+
+    def test_saved_file_is_standard_json(self):
+        """Tests that the saved file is compact JSON the standard library json module reads back the same."""
+        test_data = {
+            "crème brûlée": {"title": "Crème Brûlée", "ingredients": ["Cream", "Sugar"], "instructions": "Bake.\nTorch."}
+        }
+        save_recipes(test_data) # Written with orjson where it is installed
+        with open(self.test_file_path, encoding="utf-8") as file:
+            text = file.read()
+        self.assertEqual(json.loads(text), test_data)
+        self.assertNotIn("\n", text) # No indentation
+
+    def test_load_recipes_corrupt_file(self):
+        """Tests that a corrupt recipes file loads as an empty collection with a warning."""
+        self.test_file_path.write_bytes(b'{"saved dish": {"title": "Sav')
+        with self.assertLogs('recipe_manager', level='WARNING') as logs:
+            self.assertEqual(load_recipes(), {})
+        self.assertEqual(len(logs.records), 1)
+        self.assertTrue(logs.records[0].getMessage().startswith(f"Recipes file {self.test_file_path} is corrupt"))
+
+    def test_load_recipes_upgrades_list_file(self):
+        """Tests that a file saved as a list of recipes is loaded keyed by title_key(title)."""
+        with open(self.test_file_path, "w") as file:
+            json.dump([{"title": "Old Dish", "ingredients": ["Rice"], "instructions": "Cook."}], file)
+        self.assertEqual(load_recipes(), {"old dish": {"title": "Old Dish", "ingredients": ["Rice"], "instructions": "Cook."}})
+
+    def test_load_recipes_renames_titles_sharing_a_key(self):
+        """Tests that recipes whose titles only differed in case beyond lower() are all kept, the later one renamed."""
+        with open(self.test_file_path, "w") as file:
+            json.dump([
+                {"title": "Straße Stew", "ingredients": ["A"], "instructions": "B"},
+                {"title": "STRASSE Stew", "ingredients": ["C"], "instructions": "D"}
+            ], file)
+        with self.assertLogs('recipe_manager', level='WARNING') as logs:
+            recipes = load_recipes()
+        self.assertEqual(recipes, {
+            "strasse stew": {"title": "Straße Stew", "ingredients": ["A"], "instructions": "B"},
+            "strasse stew (2)": {"title": "STRASSE Stew (2)", "ingredients": ["C"], "instructions": "D"}
+        })
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("'STRASSE Stew (2)'", logs.records[0].getMessage())
+
+    def test_save_recipes_omits_cached_values(self):
+        """Tests that the search text cached by searching isn't saved or logged."""
+        recipe = {"title": "Cake Recipe", "ingredients": ["Flour", "Butter"], "instructions": "Bake it."}
+        self.set_input(['butter'])
+        search_recipes({"cake recipe": recipe})
+        self.assertEqual(recipe["_search_text"], "cake recipe\x1fflour\x1fbutter")
+
+        append_change({"op": "add", "recipe": recipe})
+        self.assertEqual(load_recipes(), {"cake recipe": {"title": "Cake Recipe", "ingredients": ["Flour", "Butter"], "instructions": "Bake it."}})
+        save_recipes({"cake recipe": recipe})
+        self.assertEqual(load_recipes(), {"cake recipe": {"title": "Cake Recipe", "ingredients": ["Flour", "Butter"], "instructions": "Bake it."}})
+
+class TestRecipeManagerLogic(RecipeManagerTestCase):
+    """Tests of the recipe commands and menu, which never read or write the data files."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Record changes and saves in lists instead of writing them to the data files,
+        # using plain functions patched once for the whole class rather than a MagicMock
+        # patched onto every test. The change log itself is tested in TestRecipeManagerIO.
+        cls.changes = []
+        cls.saves = []
+        for name, value in (("append_change", cls.changes.append), ("save_recipes", cls.saves.append), ("load_recipes", dict)):
+            patcher = patch(f'recipe_manager.{name}', value)
+            patcher.start()
+            cls.addClassCleanup(patcher.stop)
+
+    def setUp(self):
+        super().setUp()
+        # Forget the changes and saves recorded by the test before
+        self.changes.clear()
+        self.saves.clear()
+
+    def assertNoChange(self, recipes, expected, message):
+        """Checks that a command printed message and left the recipes equal to expected, logging no change."""
+        self.assertEqual(recipes, expected)
+        self.assertIn(message, self.stdout.getvalue())
+        self.assertEqual(self.changes, [])
+
+    def run_main(self):
+        """Runs main() as if typed at a terminal."""
+        # _batch_input is restored after main() sets it
+        with patch('recipe_manager._batch_input', False), patch('sys.stdin.isatty', lambda: True):
+            main()
+
+    def test_add_recipe_success(self):
         """Tests adding a new recipe with valid input."""
         # Mock user input for add_recipe, providing each line separately
-        with patch('builtins.input', side_effect=[
+        self.set_input([
             'Test Title',
             'Ingredient One',
             'Ingredient Two',
@@ -65,192 +340,299 @@ class TestRecipeManager(unittest.TestCase):
             'Instruction Line 1',
             'Instruction Line 2',
             'done'
-        ]):
-            add_recipe(self.test_recipes_data)
+        ])
+        self.assertTrue(add_recipe(self.test_recipes_data))
         
         self.assertEqual(len(self.test_recipes_data), 1)
-        self.assertEqual(self.test_recipes_data[0]['title'], 'Test Title')
-        self.assertEqual(self.test_recipes_data[0]['ingredients'], ['Ingredient One', 'Ingredient Two'])
-        self.assertEqual(self.test_recipes_data[0]['instructions'], 'Instruction Line 1\nInstruction Line 2')
-        mock_save_recipes.assert_called_once_with(self.test_recipes_data) # Check save was called
-
-    @patch('recipe_manager.save_recipes')
-    @patch('builtins.print') # Mock print to check output
-    def test_add_recipe_empty_title(self, mock_print, mock_save_recipes):
-        """Tests adding a recipe with an empty title."""
-        with patch('builtins.input', side_effect=['']): # Empty title input
-            add_recipe(self.test_recipes_data)
-        self.assertEqual(len(self.test_recipes_data), 0) # No recipe added
-        mock_print.assert_any_call("Title cannot be empty. Aborting recipe addition.")
-        mock_save_recipes.assert_not_called()
-
-    @patch('recipe_manager.save_recipes')
-    @patch('builtins.print')
-    def test_add_duplicate_recipe_title(self, mock_print, mock_save_recipes):
-        """Tests adding a recipe with a title that already exists."""
-        self.test_recipes_data.append({"title": "Existing Recipe", "ingredients": ["A"], "instructions": "B"})
-        with patch('builtins.input', side_effect=['Existing Recipe']): # Try to add duplicate
-            add_recipe(self.test_recipes_data)
-        self.assertEqual(len(self.test_recipes_data), 1) # Should not add a new one
-        mock_print.assert_any_call("A recipe with the title 'Existing Recipe' already exists. Please choose a different title or edit the existing recipe.")
-        mock_save_recipes.assert_not_called()
-
-    @patch('recipe_manager.save_recipes')
-    @patch('builtins.print')
-    def test_add_recipe_no_ingredients(self, mock_print, mock_save_recipes):
-        """Tests adding a recipe without any ingredients."""
-        with patch('builtins.input', side_effect=[
-            'No Ingredient Recipe',
-            'done', # No ingredients entered
-            'Some Instructions',
-            'done'
-        ]):
-            add_recipe(self.test_recipes_data)
-        self.assertEqual(len(self.test_recipes_data), 0)
-        mock_print.assert_any_call("A recipe must have atleast one ingredient. Aborting recipe.") # Fix typo here if you haven't already: "at least"
-        mock_save_recipes.assert_not_called()
-
-    @patch('recipe_manager.save_recipes')
-    @patch('builtins.print')
-    def test_add_recipe_empty_instructions(self, mock_print, mock_save_recipes):
-        """Tests adding a recipe without any instructions."""
-        with patch('builtins.input', side_effect=[
-            'No Instruction Recipe',
-            'Ing1',
-            'done',
-            'done' # No instructions entered
-        ]):
-            add_recipe(self.test_recipes_data)
-        self.assertEqual(len(self.test_recipes_data), 0)
-        mock_print.assert_any_call("Recipe instructions cannot be empty. Aborting recipe addition.")
-        mock_save_recipes.assert_not_called()
+        self.assertEqual(self.test_recipes_data['test title']['title'], 'Test Title')
+        self.assertEqual(self.test_recipes_data['test title']['ingredients'], ['Ingredient One', 'Ingredient Two'])
+        self.assertEqual(self.test_recipes_data['test title']['instructions'], 'Instruction Line 1\nInstruction Line 2')
+        self.assertEqual(self.changes, [{"op": "add", "recipe": self.test_recipes_data['test title']}])
+
+    @patch('recipe_manager._batch_input', True)
+    def test_add_recipe_batch_input(self):
+        """Tests adding a recipe with ingredients and instructions piped in on standard input."""
+        piped = io.StringIO("  Flour  \n\nEggs\ndone\nMix.\n\nBake.\ndone\n6\n")
+        self.set_input(['Piped Cake'])
+        with patch('sys.stdin', piped):
+            self.assertTrue(add_recipe(self.test_recipes_data))
+        self.assertEqual(self.test_recipes_data['piped cake']['ingredients'], ['Flour', 'Eggs'])
+        self.assertEqual(self.test_recipes_data['piped cake']['instructions'], 'Mix.\n\nBake.')
+        self.assertEqual(piped.readline(), "6\n") # Later input is left for the menu
+
+    def test_add_recipe_rejected(self):
+        """Tests that add_recipe adds nothing when the title, ingredients or instructions are invalid."""
+        # Each case: (description, function returning the recipes already present, input lines, expected message).
+        # The recipes are built afresh for the test and again for the comparison, so they share nothing.
+        cases = [
+            ("empty title", dict, [''], MSG_EMPTY_TITLE),
+            ("duplicate title", base_recipes, ['Existing Recipe'], MSG_DUPLICATE_TITLE.format('Existing Recipe')),
+            ("no ingredients", dict, ['No Ingredient Recipe', 'done', 'Some Instructions', 'done'], MSG_NO_INGREDIENTS),
+            ("empty instructions", dict, ['No Instruction Recipe', 'Ing1', 'done', 'done'], MSG_EMPTY_INSTRUCTIONS),
+        ]
+        for description, seed, inputs, message in cases:
+            with self.subTest(description):
+                recipes = seed()
+                self.set_input(inputs)
+                self.stdout.seek(0)
+                self.stdout.truncate()
+                self.assertFalse(add_recipe(recipes))
+                self.assertNoChange(recipes, seed(), message)
 
 
-    @patch('builtins.print')
-    def test_view_recipes_empty(self, mocked_print):
+    def test_view_recipes_empty(self):
         """Tests viewing recipes when the list is empty."""
         view_recipes(self.test_recipes_data)
-        mocked_print.assert_any_call("No recipes available.")
+        self.assertIn("No recipes available.", self.stdout.getvalue())
 
-    @patch('builtins.print')
-    def test_view_recipes_multiple(self, mocked_print):
+    def test_view_recipes_multiple(self):
         """Tests viewing multiple recipes with correct formatting."""
-        self.test_recipes_data.append({"title": "Recipe One", "ingredients": ["Flour", "Water"], "instructions": "Mix and bake."})
-        self.test_recipes_data.append({"title": "Recipe Two", "ingredients": ["Sugar", "Milk"], "instructions": "Stir well."})
+        self.test_recipes_data["recipe one"] = {"title": "Recipe One", "ingredients": ["Flour", "Water"], "instructions": "Mix and bake."}
+        self.test_recipes_data["recipe two"] = {"title": "Recipe Two", "ingredients": ["Sugar", "Milk"], "instructions": "Stir well."}
 
         view_recipes(self.test_recipes_data)
 
-        # Check for specific call patterns that indicate correct formatting
-        mocked_print.assert_any_call("\n--- All Recipes ---")
-        mocked_print.assert_any_call("There are 2 available recipe(s) listed below:")
-        mocked_print.assert_any_call("\n--- Recipe 1: Recipe One ---")
-        mocked_print.assert_any_call("Ingredients:")
-        mocked_print.assert_any_call("- Flour")
-        mocked_print.assert_any_call("- Water")
-        mocked_print.assert_any_call("\nInstructions:")
-        mocked_print.assert_any_call("Mix and bake.")
-        mocked_print.assert_any_call("\n--- Recipe 2: Recipe Two ---")
-        mocked_print.assert_any_call("- Sugar")
-        mocked_print.assert_any_call("- Milk")
-        mocked_print.assert_any_call("Stir well.")
-
-
-    @patch('builtins.print')
-    @patch('builtins.input', side_effect=['Searchable']) # Mock input for search term
-    def test_search_recipes_found_by_title(self, mock_input, mocked_print):
+        # Check the output is formatted as expected
+        self.assertEqual(self.stdout.getvalue(),
+            "\n--- All Recipes ---\n"
+            "There are 2 available recipe(s) listed below:\n"
+            "\n--- Recipe 1: Recipe One ---\n"
+            "Ingredients:\n"
+            "- Flour\n"
+            "- Water\n"
+            "\nInstructions:\n"
+            "Mix and bake.\n"
+            "------------------------\n"
+            "\n--- Recipe 2: Recipe Two ---\n"
+            "Ingredients:\n"
+            "- Sugar\n"
+            "- Milk\n"
+            "\nInstructions:\n"
+            "Stir well.\n"
+            "------------------------\n")
+
+    @patch('recipe_manager.OUTPUT_CHUNK_SIZE', 2)
+    def test_view_recipes_writes_in_chunks(self):
+        """Tests that recipes are written in chunks of OUTPUT_CHUNK_SIZE recipes."""
+        for i in range(5):
+            self.test_recipes_data[f"dish {i}"] = {"title": f"Dish {i}", "ingredients": ["A"], "instructions": "B"}
+        with patch.object(self.stdout, 'write', wraps=self.stdout.write) as mock_write:
+            view_recipes(self.test_recipes_data)
+        recipe_writes = [c.args[0] for c in mock_write.call_args_list if "--- Recipe" in c.args[0]]
+        self.assertEqual([text.count("--- Recipe") for text in recipe_writes], [2, 2, 1])
+
+
+    def test_search_recipes_found_by_title(self):
         """Tests searching for a recipe by title."""
-        self.test_recipes_data.append({"title": "Searchable Recipe", "ingredients": ["X"], "instructions": "Y"})
+        self.set_input(['Searchable'])
+        self.test_recipes_data["searchable recipe"] = {"title": "Searchable Recipe", "ingredients": ["X"], "instructions": "Y"}
         search_recipes(self.test_recipes_data) # No search_term argument here, it's prompted
 
-        mocked_print.assert_any_call("Found 1 recipe(s) matching 'searchable':")
-        mocked_print.assert_any_call("\n--- Found Recipe 1: Searchable Recipe ---")
-        mocked_print.assert_any_call("Ingredients:")
-        mocked_print.assert_any_call("- X")
-        mocked_print.assert_any_call("\nInstructions:")
-        mocked_print.assert_any_call("Y")
+        self.assertInOrder(self.stdout.getvalue(), [
+            "Found 1 recipe(s) matching 'searchable':\n",
+            "\n--- Found Recipe 1: Searchable Recipe ---\nIngredients:\n- X\n\nInstructions:\nY\n"
+        ])
 
-    @patch('builtins.print')
-    @patch('builtins.input', side_effect=['butter']) # Mock input for search term
-    def test_search_recipes_found_by_ingredient(self, mock_input, mocked_print):
+    def test_search_recipes_found_by_ingredient(self):
         """Tests searching for a recipe by ingredient."""
-        self.test_recipes_data.append({"title": "Cake Recipe", "ingredients": ["Flour", "Butter", "Eggs"], "instructions": "Bake it."})
+        self.set_input(['butter'])
+        self.test_recipes_data["cake recipe"] = {"title": "Cake Recipe", "ingredients": ["Flour", "Butter", "Eggs"], "instructions": "Bake it."}
         search_recipes(self.test_recipes_data)
 
-        mocked_print.assert_any_call("Found 1 recipe(s) matching 'butter':")
-        mocked_print.assert_any_call("\n--- Found Recipe 1: Cake Recipe ---")
-        mocked_print.assert_any_call("- Flour")
-        mocked_print.assert_any_call("- Butter")
+        self.assertInOrder(self.stdout.getvalue(), [
+            "Found 1 recipe(s) matching 'butter':\n",
+            "\n--- Found Recipe 1: Cake Recipe ---\n",
+            "- Flour\n- Butter\n"
+        ])
 
 
-    @patch('builtins.print')
-    @patch('builtins.input', side_effect=['NonExistent']) # Mock input for search term
-    def test_search_recipes_not_found(self, mock_input, mocked_print):
+    def test_search_recipes_large_collection(self):
+        """Tests that searching 5,000 recipes beats checking each title and ingredient in turn."""
+        for i in range(5000):
+            ingredients = [f"Ingredient {i % 97}", f"Spice {i % 89}", "Saffron" if i % 1000 == 0 else "Salt"]
+            self.test_recipes_data[f"dish {i}"] = {"title": f"Dish {i}", "ingredients": ingredients, "instructions": "B"}
+
+        def search():
+            self.set_input(['saffron'])
+            search_recipes(self.test_recipes_data)
+
+        def search_each_ingredient():
+            # The search as first written, measured in the same run so the comparison
+            # holds on slow machines and under tracers such as coverage
+            return [recipe for recipe in self.test_recipes_data.values()
+                    if 'saffron' in recipe['title'].lower() or any('saffron' in ingredient.lower() for ingredient in recipe['ingredients'])]
+
+        # Best of a few searches; the first also caches each recipe's search text.
+        # The cached search runs several times faster, printing included.
+        self.assertLess(best_time(search), best_time(search_each_ingredient))
+        self.assertIn("Found 5 recipe(s) matching 'saffron':\n", self.stdout.getvalue())
+
+    def test_search_recipes_not_found(self):
         """Tests searching for a recipe that does not exist."""
-        self.test_recipes_data.append({"title": "Existing Recipe", "ingredients": ["A"], "instructions": "B"})
+        self.set_input(['NonExistent'])
+        self.test_recipes_data = base_recipes()
         search_recipes(self.test_recipes_data)
-        mocked_print.assert_any_call("No recipes found matching 'nonexistent'.")
-
-    @patch('recipe_manager.save_recipes')
-    @patch('builtins.print')
-    @patch('builtins.input', side_effect=[
-        'Editable Recipe',  # Title to edit
-        'New Edited Title', # New title
-        'New Ingredient 1', # New ingredients
-        'New Ingredient 2',
-        'done',
-        'Updated Instructions Line 1', # New instructions
-        'Updated Instructions Line 2',
-        'done'
-    ])
-    def test_edit_recipe_success(self, mock_input, mock_print, mock_save_recipes):
+        self.assertIn("No recipes found matching 'nonexistent'.", self.stdout.getvalue())
+
+    def test_edit_recipe_success(self):
         """Tests successful editing of a recipe."""
-        self.test_recipes_data.append({"title": "Editable Recipe", "ingredients": ["Old Ing"], "instructions": "Old Instr"})
+        self.set_input([
+            'Editable Recipe',  # Title to edit
+            'New Edited Title', # New title
+            'New Ingredient 1', # New ingredients
+            'New Ingredient 2',
+            'done',
+            'Updated Instructions Line 1', # New instructions
+            'Updated Instructions Line 2',
+            'done'
+        ])
+        self.test_recipes_data["editable recipe"] = {"title": "Editable Recipe", "ingredients": ["Old Ing"], "instructions": "Old Instr"}
         
-        edit_recipe(self.test_recipes_data)
+        self.assertTrue(edit_recipe(self.test_recipes_data))
         
-        self.assertEqual(self.test_recipes_data[0]['title'], 'New Edited Title')
-        self.assertEqual(self.test_recipes_data[0]['ingredients'], ['New Ingredient 1', 'New Ingredient 2'])
-        self.assertEqual(self.test_recipes_data[0]['instructions'], 'Updated Instructions Line 1\nUpdated Instructions Line 2')
-        mock_print.assert_any_call("Recipe 'New Edited Title' updated successfully!")
-        mock_save_recipes.assert_called_once_with(self.test_recipes_data)
-
-    @patch('recipe_manager.save_recipes')
-    @patch('builtins.print')
-    @patch('builtins.input', side_effect=['NonExistent Recipe'])
-    def test_edit_recipe_not_found(self, mock_input, mock_print, mock_save_recipes):
+        self.assertNotIn('editable recipe', self.test_recipes_data)
+        self.assertEqual(self.test_recipes_data['new edited title']['title'], 'New Edited Title')
+        self.assertEqual(self.test_recipes_data['new edited title']['ingredients'], ['New Ingredient 1', 'New Ingredient 2'])
+        self.assertEqual(self.test_recipes_data['new edited title']['instructions'], 'Updated Instructions Line 1\nUpdated Instructions Line 2')
+        self.assertInOrder(self.stdout.getvalue(), [
+            "\n--- Recipe 1: Editable Recipe ---\n", # Recipes are listed first
+            "Editing recipe: 'Editable Recipe'",
+            "Current Ingredients:\n1. Old Ing\n",
+            "Current Instructions:\nOld Instr\n",
+            "Recipe 'New Edited Title' updated successfully!"
+        ])
+        self.assertEqual(self.changes, [{"op": "edit", "key": "editable recipe", "recipe": self.test_recipes_data['new edited title']}])
+
+    @patch('recipe_manager.view_recipes', lambda recipes: None) # Listing every recipe first is linear by design
+    def test_edit_recipe_large_collection(self):
+        """Tests that finding and editing a recipe doesn't slow down with the number of recipes."""
+        for i in range(10_000):
+            self.test_recipes_data[f"dish {i}"] = {"title": f"Dish {i}", "ingredients": ["A"], "instructions": "B"}
+
+        def edit():
+            # Edit the last recipe, keeping its title, ingredients and instructions
+            self.set_input(['DISH 9999', '', 'done', 'no', 'done'])
+            self.assertTrue(edit_recipe(self.test_recipes_data))
+
+        def find_by_comparing_titles():
+            # Measured in the same run so the comparison holds on slow machines and under tracers
+            for recipe in self.test_recipes_data.values():
+                if recipe['title'].lower() == 'dish 9999':
+                    return recipe
+
+        # With a dictionary lookup the whole edit is many times faster than
+        # comparing every title would be on its own
+        self.assertLess(best_time(edit), best_time(find_by_comparing_titles))
+        self.assertEqual(len(self.test_recipes_data), 10_000)
+        self.assertEqual(self.changes[-1]["key"], "dish 9999")
+
+    def test_edit_recipe_not_found(self):
         """Tests editing a recipe that doesn't exist."""
-        self.test_recipes_data.append({"title": "Existing Recipe", "ingredients": ["A"], "instructions": "B"})
-        edit_recipe(self.test_recipes_data)
-        mock_print.assert_any_call("Recipe with title 'NonExistent Recipe' not found.")
-        mock_save_recipes.assert_not_called()
-        self.assertEqual(len(self.test_recipes_data), 1) # Should not have changed
+        self.set_input(['NonExistent Recipe'])
+        self.test_recipes_data = base_recipes()
+        self.assertFalse(edit_recipe(self.test_recipes_data))
+        self.assertNoChange(self.test_recipes_data, base_recipes(), MSG_RECIPE_NOT_FOUND.format('NonExistent Recipe'))
 
 
-    @patch('recipe_manager.save_recipes')
-    @patch('builtins.print')
-    @patch('builtins.input', side_effect=['Deletable Recipe'])
-    def test_delete_recipe_success(self, mock_input, mock_print, mock_save_recipes):
+    def test_delete_recipe_success(self):
         """Tests successful deletion of a recipe."""
-        self.test_recipes_data.append({"title": "Deletable Recipe", "ingredients": ["A"], "instructions": "B"})
+        self.set_input(['Deletable Recipe'])
+        self.test_recipes_data["deletable recipe"] = {"title": "Deletable Recipe", "ingredients": ["A"], "instructions": "B"}
         self.assertEqual(len(self.test_recipes_data), 1) # Ensure it starts with one
 
-        delete_recipe(self.test_recipes_data)
+        self.assertTrue(delete_recipe(self.test_recipes_data))
         
         self.assertEqual(len(self.test_recipes_data), 0)
-        mock_print.assert_any_call("Recipe 'Deletable Recipe' deleted successfully!")
-        mock_save_recipes.assert_called_once_with(self.test_recipes_data)
+        self.assertIn("Recipe 'Deletable Recipe' deleted successfully!", self.stdout.getvalue())
+        self.assertEqual(self.changes, [{"op": "delete", "key": "deletable recipe"}])
 
-    @patch('recipe_manager.save_recipes')
-    @patch('builtins.print')
-    @patch('builtins.input', side_effect=['NonExistent Recipe'])
-    def test_delete_recipe_not_found(self, mock_input, mock_print, mock_save_recipes):
-        """Tests deleting a recipe that does not exist."""
-        self.test_recipes_data.append({"title": "Existing Recipe", "ingredients": ["A"], "instructions": "B"})
-        delete_recipe(self.test_recipes_data)
-        mock_print.assert_any_call("Recipe with title 'NonExistent Recipe' not found.")
-        mock_save_recipes.assert_not_called()
-        self.assertEqual(len(self.test_recipes_data), 1) # Should not have changed
+    def test_delete_recipe_keeps_other_recipes(self):
+        """Tests that deleting removes only the matching recipe (case-insensitive) and leaves the rest untouched."""
+        self.set_input(['DELETABLE recipe'])
+        kept = {"title": "Kept Recipe", "ingredients": ["A"], "instructions": "B"}
+        self.test_recipes_data["kept recipe"] = kept
+        self.test_recipes_data["deletable recipe"] = {"title": "Deletable Recipe", "ingredients": ["A"], "instructions": "B"}
+
+        self.assertTrue(delete_recipe(self.test_recipes_data))
 
+        self.assertEqual(list(self.test_recipes_data), ["kept recipe"])
+        self.assertIs(self.test_recipes_data["kept recipe"], kept)
 
-if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    def test_delete_recipe_matches_case_folded_title(self):
+        """Tests that titles match case-insensitively beyond ASCII (e.g. 'ß' and 'SS')."""
+        self.set_input(['STRASSE Stew'])
+        self.test_recipes_data[title_key("Straße Stew")] = {"title": "Straße Stew", "ingredients": ["A"], "instructions": "B"}
+        self.assertTrue(delete_recipe(self.test_recipes_data))
+        self.assertEqual(self.test_recipes_data, {})
+
+    def test_delete_recipe_not_found(self):
+        """Tests deleting a recipe that does not exist."""
+        self.set_input(['NonExistent Recipe'])
+        self.test_recipes_data = base_recipes()
+        self.assertFalse(delete_recipe(self.test_recipes_data))
+        self.assertNoChange(self.test_recipes_data, base_recipes(), MSG_RECIPE_NOT_FOUND.format('NonExistent Recipe'))
+
+    def test_main_saves_changes_on_exit(self):
+        """Tests that main() saves once on exit instead of after every change."""
+        self.set_input([
+            '1', 'Quick Toast', 'Bread', 'done', 'Toast the bread.', 'done', # Add a recipe
+            '2', # View recipes
+            '6' # Exit
+        ])
+        self.run_main()
+        self.assertEqual(len(self.saves), 1)
+        self.assertIn('quick toast', self.saves[0])
+        # Lines that must each have been printed, in any order
+        self.assertLessEqual({
+            "Recipe Manager System Initialized.",
+            "Recipe 'Quick Toast' add successfully!",
+            "There are 1 available recipe(s) listed below:",
+            "--- Recipe 1: Quick Toast ---",
+            "Exiting Recipe Manager. Goodbye!"
+        }, set(self.stdout.getvalue().splitlines()))
+
+    @patch('recipe_manager.log_needs_compaction', lambda: True)
+    def test_main_saves_when_log_needs_compaction(self):
+        """Tests that main() saves straight after a change once the change log has grown too large."""
+        self.set_input([
+            '1', 'Quick Toast', 'Bread', 'done', 'Toast the bread.', 'done', # Add a recipe
+            '1', 'Slow Toast', 'Bread', 'done', 'Toast it slowly.', 'done', # Add another
+            '6' # Exit, with nothing left to save
+        ])
+        self.run_main()
+        self.assertEqual(len(self.saves), 2)
+
+    def test_main_interrupted_mid_edit_saves_nothing(self):
+        """Tests that stopping main() part way through an edit doesn't save the half-edited recipes."""
+        def typed_then_interrupted():
+            yield from [
+                '1', 'Toast', 'Bread', 'done', 'Toast the bread.', 'done', # Add a recipe
+                '4', 'Toast', 'Renamed Toast' # Start editing it, renaming it...
+            ]
+            raise KeyboardInterrupt # ...then press Ctrl-C at the ingredients prompt
+        self.set_input(typed_then_interrupted())
+        exit_handlers = []
+        with patch('atexit.register', exit_handlers.append), self.assertRaises(KeyboardInterrupt):
+            self.run_main()
+        self.assertEqual(exit_handlers, []) # Nothing left to save the recipes on the way out
+        self.assertEqual(self.saves, [])
+        # Only the finished add was logged, so that is all the next load replays
+        self.assertEqual([change["op"] for change in self.changes], ["add"])
+
+    def test_main_skips_save_without_changes(self):
+        """Tests that main() doesn't rewrite the file when nothing changed."""
+        self.set_input(['2', '6'])
+        self.run_main()
+        self.assertEqual(self.saves, [])
+
+
+    def test_main_invalid_choice(self):
+        """Tests that main() shows the menu and rejects choices that aren't on it."""
+        self.set_input(['9', '6'])
+        self.run_main()
+        output = self.stdout.getvalue()
+        self.assertEqual(output.count(MENU), 2)
+        self.assertLessEqual({
+            MSG_INVALID_CHOICE,
+            "Exiting Recipe Manager. Goodbye!"
+        }, set(output.splitlines()))
\ No newline at end of file